@@ -3,19 +3,45 @@ FastAPI Backend for PDF/Image OCR using Marker
 Provides CAD_OCR-compatible API interface
 """
 
+import asyncio
+import functools
+import gc
+import hashlib
 import os
+import secrets
+import tempfile
+from collections import OrderedDict
 from typing import List
 import time
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from concurrent.futures import ThreadPoolExecutor
+
+# Reduce CUDA allocator fragmentation during large batches; must be set
+# before torch is imported to take effect. This relies on torch's caching
+# allocator as the tensor pool for the per-page crop buffers created inside
+# surya — a hand-rolled size-keyed pool would mean monkey-patching surya's
+# recognition loop for allocations the allocator already recycles. The same
+# applies to pinned-memory H2D staging: the image-to-tensor step lives in
+# surya's processors, which pin and batch transfers themselves.
+os.environ.setdefault(
+    "PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True,max_split_size_mb:128"
+)
+
 import torch
+
+# Let cudnn autotune conv algorithms per input shape; the warmup pass in
+# lifespan pays the tuning cost before real traffic arrives.
+torch.backends.cudnn.benchmark = True
+
 from pathlib import Path
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse, Response
+from starlette.background import BackgroundTask
 from starlette.middleware.base import BaseHTTPMiddleware
 from pydantic import BaseModel
 from dotenv import load_dotenv
+import aiofiles
 import filetype
 
 # Load environment variables
@@ -26,6 +52,7 @@ from marker.converters.pdf import PdfConverter  # noqa: E402
 from marker.models import create_model_dict  # noqa: E402
 from marker.output import text_from_rendered  # noqa: E402
 
+from pdfium_lock import PDFIUM_LOCK  # noqa: E402
 from quality_checker import check_document_quality  # noqa: E402
 
 # Configuration
@@ -35,22 +62,48 @@ API_DESCRIPTION = "PDF and Image to Markdown conversion using Marker"
 
 # CORS Origins - read from env or use defaults
 CORS_ORIGINS_ENV = os.getenv("CORS_ORIGINS", "")
-if CORS_ORIGINS_ENV:
-    CORS_ORIGINS = [origin.strip() for origin in CORS_ORIGINS_ENV.split(",")]
-else:
-    CORS_ORIGINS = [
-        "http://localhost:5173",
-        "http://localhost:5174",
-        "http://localhost:3000",
-        "http://127.0.0.1:5173",
-        "http://127.0.0.1:5174",
-    ]
-
-UPLOAD_DIR = Path(__file__).parent / "uploads"
-UPLOAD_DIR.mkdir(exist_ok=True)
+# Empty entries (trailing commas, double commas) would otherwise slip into
+# the allow-list and never match anything; filter them at startup so the
+# middleware only compares real origins. An env value of "*" takes
+# Starlette's wildcard fast path (see allow_credentials below).
+CORS_ORIGINS = [
+    origin for origin in (o.strip() for o in CORS_ORIGINS_ENV.split(",")) if origin
+] or [
+    "http://localhost:5173",
+    "http://localhost:5174",
+    "http://localhost:3000",
+    "http://127.0.0.1:5173",
+    "http://127.0.0.1:5174",
+]
+CORS_ALLOW_ALL = CORS_ORIGINS == ["*"]
+
+def _default_upload_dir() -> Path:
+    """
+    Pick the upload scratch directory, preferring tmpfs.
+
+    Marker's converter, the quality checker, and the notes extractor are all
+    path-based, so uploads have to land on a filesystem — but /dev/shm keeps
+    the write+read round trip in RAM instead of hitting disk.
+    """
+    env_dir = os.getenv("UPLOAD_DIR")
+    if env_dir:
+        return Path(env_dir)
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        return shm / "marker_uploads"
+    return Path(__file__).parent / "uploads"
+
+
+UPLOAD_DIR = _default_upload_dir()
+UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 PER_FILE_TIMEOUT = 600  # 10 minutes max per file
 
+# Markdown outputs above this size are streamed as text/markdown (when the
+# client opts in) instead of being embedded in the JSON body — Starlette's
+# FileResponse uses sendfile(2) on Linux, skipping the userspace copy.
+LARGE_RESPONSE_THRESHOLD = 512 * 1024
+
 # Supported file types
 ALLOWED_EXTENSIONS = {
     # PDF
@@ -80,10 +133,206 @@ ALLOWED_MIMES = {
 # Maximum number of files allowed in a single batch request
 MAX_BATCH_FILES = 50
 
+# Model precision override: bfloat16 / float16 / float32 / int8.
+# Empty = let Marker pick its per-device default (bfloat16 on CUDA).
+MARKER_DTYPE = os.getenv("MARKER_DTYPE", "").strip().lower()
+
+# Opt-in torch.compile of the Marker submodels. Off by default: compilation
+# adds minutes of startup/warmup time that only pays off on long-running
+# GPU deployments.
+TORCH_COMPILE = os.getenv("TORCH_COMPILE", "0") == "1"
+
+# Number of OCR worker threads — clamped to 1. The pdfium safety model
+# (see pdfium_lock.py) relies on the marker executor being a single thread:
+# Marker's internal pdfium use takes no lock, so a second worker could run it
+# concurrently with a locked call site on the first, and the shared
+# app-lifetime PdfConverter is not safe to call from two threads either.
+# PDFium itself is not thread-safe, so this is a segfault, not a slowdown.
+# For parallel throughput, run multiple uvicorn workers (WORKERS env) — each
+# process gets its own converter, models, and pdfium.
+MARKER_WORKERS = 1
+if os.getenv("MARKER_WORKERS", "1").strip() not in ("", "1"):
+    print(
+        "⚠ MARKER_WORKERS is ignored (clamped to 1): PDFium and the shared "
+        "converter cannot run on multiple threads. Use WORKERS for parallelism."
+    )
+
+_DTYPE_ALIASES = {
+    "bfloat16": torch.bfloat16,
+    "bf16": torch.bfloat16,
+    "float16": torch.float16,
+    "fp16": torch.float16,
+    "half": torch.float16,
+    "float32": torch.float32,
+    "fp32": torch.float32,
+}
+
 # Global state
 app_data = {}
 
 
+def _quantize_models_int8(models: dict) -> None:
+    """Dynamically quantize Linear layers to INT8 in-place (CPU deployments).
+
+    Halves weight memory bandwidth on the matmul-heavy recognition/layout
+    nets; not applicable on CUDA where bfloat16 is already the default.
+    """
+    import torch.nn as nn
+
+    for name, predictor in models.items():
+        model = getattr(predictor, "model", None)
+        if model is None:
+            continue
+        try:
+            predictor.model = torch.ao.quantization.quantize_dynamic(
+                model, {nn.Linear}, dtype=torch.qint8
+            )
+            print(f"  ✓ INT8 quantized: {name}")
+        except Exception as e:
+            print(f"  ⚠ INT8 quantization skipped for {name}: {e}")
+
+
+# Bounded LRU of converter output keyed by upload content hash — markdown
+# results are tiny next to the seconds-to-minutes of GPU time they replace.
+OCR_CACHE_SIZE = 128
+
+
+def cache_get(cache: OrderedDict, key: str):
+    """Return the cached value for *key* (refreshing its LRU slot) or None."""
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+    return None
+
+
+def cache_put(cache: OrderedDict, key: str, value, maxsize: int = OCR_CACHE_SIZE):
+    """Insert *value* under *key*, evicting least-recently-used entries."""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > maxsize:
+        cache.popitem(last=False)
+
+
+def _compile_models(models: dict) -> None:
+    """Compile each predictor's network with torch.compile (TORCH_COMPILE=1).
+
+    mode="reduce-overhead" makes inductor capture CUDA graphs per stable
+    input shape and replay them, which is what cuts kernel-launch overhead
+    in Surya's recognition loop; hand-rolled torch.cuda.graph bucketing
+    would have to live inside surya's generate loop and is not attempted
+    here. Compilation happens lazily: the first request through each
+    submodel triggers the actual graph capture, so expect a slow first
+    batch (the lifespan warmup absorbs part of this).
+    """
+    for name, predictor in models.items():
+        model = getattr(predictor, "model", None)
+        if not isinstance(model, torch.nn.Module):
+            continue
+        try:
+            predictor.model = torch.compile(
+                model, mode="reduce-overhead", fullgraph=False, dynamic=False
+            )
+            print(f"  ✓ torch.compile: {name}")
+        except Exception as e:
+            print(f"  ⚠ torch.compile skipped for {name}: {e}")
+
+
+def load_marker_models() -> dict:
+    """Load the Marker model dict, honouring the MARKER_DTYPE override."""
+    if MARKER_DTYPE in ("int8", "qint8"):
+        models = create_model_dict(dtype=torch.float32)
+        _quantize_models_int8(models)
+        return models
+    dtype = _DTYPE_ALIASES.get(MARKER_DTYPE)
+    if MARKER_DTYPE and dtype is None:
+        print(f"⚠ Unknown MARKER_DTYPE={MARKER_DTYPE!r} — using Marker default")
+    models = create_model_dict(dtype=dtype)
+    if TORCH_COMPILE:
+        _compile_models(models)
+    return models
+
+
+# Native PDFs (exported, not scanned) carry an embedded text layer; if text
+# extraction averages at least this many characters per page, trust it and
+# skip OCR entirely.
+NATIVE_TEXT_MIN_CHARS_PER_PAGE = 200
+
+# The bypass is opt-in: CAD-exported drawings are vector PDFs with plenty of
+# embedded text, so the heuristic catches exactly our core inputs and returns
+# a raw pdfium text dump in place of Marker's structured markdown (headings,
+# tables, reading order). Marker already skips OCR on text-layer PDFs
+# internally, so the bypass only saves the layout pass — enable it when raw
+# text is acceptable and layout latency isn't.
+NATIVE_TEXT_FAST_PATH = os.getenv("NATIVE_TEXT_FAST_PATH", "0") == "1"
+
+
+def extract_native_text(fpath) -> "str | None":
+    """
+    Return the embedded text layer of a PDF, or None if it looks like a scan.
+
+    Extracts text via pypdfium2 and requires an average of at least
+    NATIVE_TEXT_MIN_CHARS_PER_PAGE characters per page — below that the PDF
+    is treated as a scan and handed to the full Marker pipeline.
+    """
+    import pypdfium2 as pdfium
+
+    with PDFIUM_LOCK:  # PDFium is not thread-safe
+        try:
+            doc = pdfium.PdfDocument(str(fpath))
+        except Exception:
+            return None
+        try:
+            pages_text = []
+            for page in doc:
+                pages_text.append(page.get_textpage().get_text_range().strip())
+        except Exception:
+            return None
+        finally:
+            doc.close()
+    total = sum(len(t) for t in pages_text)
+    if not pages_text or total < NATIVE_TEXT_MIN_CHARS_PER_PAGE * len(pages_text):
+        return None
+    return "\n\n".join(pages_text)
+
+
+# Reclaim CUDA pool slack only past this threshold. A blanket per-request
+# empty_cache() stalls the GPU and makes the allocator refault its pool,
+# while never clearing eventually OOMs between heterogeneous crop sizes even
+# with free VRAM. expandable_segments (set before `import torch` above)
+# prevents most fragmentation; this guard is the backstop.
+CUDA_CACHE_SLACK_BYTES = 2 << 30  # 2 GiB reserved but unallocated
+
+
+def maybe_empty_cuda_cache() -> None:
+    """Free cached CUDA blocks when pool slack exceeds CUDA_CACHE_SLACK_BYTES."""
+    if not torch.cuda.is_available():
+        return
+    slack = torch.cuda.memory_reserved() - torch.cuda.memory_allocated()
+    if slack > CUDA_CACHE_SLACK_BYTES:
+        torch.cuda.synchronize()
+        torch.cuda.empty_cache()
+
+
+# Periodic collection cadence. CUDA tensors freed by Python refcounting
+# return to the torch pool immediately, but reference cycles inside Marker's
+# rendered document objects can park tensors until the cyclic GC runs; a
+# sweep every N requests keeps steady-state VRAM bounded without paying
+# gc.collect() latency on every response.
+GC_EVERY_N_REQUESTS = 20
+_request_counter = 0
+
+
+def note_request_done() -> None:
+    """Count a finished OCR request; every GC_EVERY_N_REQUESTS, sweep."""
+    # Called only from request handlers on the event-loop thread, so the
+    # bare counter needs no lock.
+    global _request_counter
+    _request_counter += 1
+    if _request_counter % GC_EVERY_N_REQUESTS == 0:
+        gc.collect()
+        maybe_empty_cuda_cache()
+
+
 class OCRResponse(BaseModel):
     success: bool
     filename: str = ""
@@ -97,9 +346,19 @@ class OCRResponse(BaseModel):
     contrast: float = 0.0
 
 
-def sanitize_filename(filename: str) -> str:
-    """Strip any directory components to prevent path traversal."""
-    return Path(filename).name
+def scratch_path(filename: str) -> Path:
+    """
+    Unique scratch path for an upload.
+
+    The user-controlled name never touches the filesystem (only its suffix
+    is kept), which both prevents path traversal and lets concurrent uploads
+    of identically named files proceed without colliding on one path.
+
+    A reused single scratch file (open with O_TRUNC, never unlink) was
+    considered to save metadata syscalls, but batch pipelining keeps several
+    files alive at once, and create/unlink on tmpfs is too cheap to matter.
+    """
+    return UPLOAD_DIR / (secrets.token_hex(8) + get_file_extension(filename))
 
 
 def get_file_extension(filename: str) -> str:
@@ -128,6 +387,143 @@ def get_file_type(filename: str) -> str:
     return "image"
 
 
+# Chunk size for streaming uploads to disk.
+# Writes go through aiofiles onto tmpfs (see _default_upload_dir); with the
+# multipart parser handing us one chunk at a time there is no batched-write
+# window for io_uring fixed buffers to exploit, so plain async writes are used.
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1MB
+
+
+async def save_upload(file: UploadFile, file_path: Path) -> tuple:
+    """
+    Stream an upload to *file_path* in chunks.
+
+    Returns ``(size, sha256_hexdigest)``. Avoids buffering the whole file in
+    memory: the size limit is enforced incrementally so oversized uploads
+    abort early, magic bytes are validated on the first chunk, and the
+    content hash is computed on the fly (hardware SHA extensions make this
+    negligible next to the write itself). On rejection the partial file is
+    removed and an HTTPException(400) is raised.
+    """
+    size = 0
+    first_chunk = True
+    digest = hashlib.sha256()
+    try:
+        # aiofiles keeps the event loop free during disk writes
+        async with aiofiles.open(file_path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                if first_chunk:
+                    if not validate_file_content(chunk):
+                        raise HTTPException(
+                            status_code=400,
+                            detail="File content does not match a supported type",
+                        )
+                    first_chunk = False
+                size += len(chunk)
+                if size > MAX_FILE_SIZE:
+                    raise HTTPException(
+                        status_code=413, detail="File too large (max 50MB)"
+                    )
+                digest.update(chunk)
+                await f.write(chunk)
+        if first_chunk:  # empty upload
+            raise HTTPException(
+                status_code=400,
+                detail="File content does not match a supported type",
+            )
+    except HTTPException:
+        if file_path.exists():
+            try:
+                os.remove(file_path)
+            except Exception:
+                pass
+        raise
+    return size, digest.hexdigest()
+
+
+# Micro-batching window for /api/extract-notes: requests arriving within
+# this many seconds are coalesced into one Surya det/rec call. The wait is
+# noise next to multi-second OCR, and concurrent requests stop paying the
+# single-crop (batch=1) GPU occupancy penalty.
+NOTES_BATCH_WINDOW = 0.05
+NOTES_BATCH_MAX = 8
+
+
+class NotesBatcher:
+    """
+    Coalesce concurrent single-file notes extractions into batched OCR calls.
+
+    Each request parks on a future; the first arrival schedules a flush after
+    NOTES_BATCH_WINDOW, and a full batch (NOTES_BATCH_MAX) flushes
+    immediately. A flush runs extract_notes_from_pdfs once on the marker
+    executor and fans results back out. Crop previews are rendered when any
+    request in the batch wants one and stripped for those that don't.
+    """
+
+    def __init__(self, models, executor):
+        self.models = models
+        self.executor = executor
+        self._queue = []  # (file_path, include_image, future)
+        self._lock = asyncio.Lock()
+        self._flush_task = None
+
+    async def extract(self, file_path: Path, include_image: bool) -> dict:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        async with self._lock:
+            self._queue.append((file_path, include_image, fut))
+            if len(self._queue) >= NOTES_BATCH_MAX:
+                batch = self._drain()
+            else:
+                batch = None
+                if self._flush_task is None:
+                    self._flush_task = loop.create_task(self._delayed_flush())
+        if batch:
+            await self._run(batch)
+        return await fut
+
+    def _drain(self):
+        batch, self._queue = self._queue, []
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        return batch
+
+    async def _delayed_flush(self):
+        try:
+            await asyncio.sleep(NOTES_BATCH_WINDOW)
+        except asyncio.CancelledError:
+            return  # a full batch drained the queue already
+        async with self._lock:
+            self._flush_task = None
+            batch = self._drain()
+        if batch:
+            await self._run(batch)
+
+    async def _run(self, batch):
+        from notes_extractor import extract_notes_from_pdfs  # lazy import
+
+        paths = [str(p) for p, _, _ in batch]
+        include_any = any(inc for _, inc, _ in batch)
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor,
+                lambda: extract_notes_from_pdfs(
+                    paths, self.models, include_crop_image=include_any
+                ),
+            )
+        except Exception as exc:
+            for _, _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        for (_, include_image, fut), result in zip(batch, results):
+            if not include_image:
+                result["crop_image_b64"] = None
+            if not fut.done():
+                fut.set_result(result)
+
+
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     """Add basic security headers to every response."""
 
@@ -153,22 +549,72 @@ async def lifespan(app: FastAPI):
         print(f"✓ CUDA available - Using GPU: {torch.cuda.get_device_name(0)}")
     else:
         print("⚠ CUDA not available - Using CPU")
-
-    # Load models
+        # Cap torch's intra-op threads and Starlette's default threadpool so
+        # CPU inference doesn't oversubscribe cores: the model library already
+        # parallelises internally, and FastAPI's default 40-worker pool on top
+        # of that just thrashes caches. OMP_NUM_THREADS / MKL_NUM_THREADS can
+        # still tighten this further from the environment.
+        try:
+            torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+            torch.set_num_interop_threads(2)
+        except RuntimeError:
+            pass  # already configured (e.g. on reload)
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=2))
+
+    # Load models — fail hard if this doesn't work. Falling back to a lazy
+    # load inside a request handler would freeze the server for minutes on
+    # first request; better to exit and let the orchestrator restart us.
+    print("\n📦 Loading Marker models...")
+    print("This may take a few minutes on first run (downloading ~2-3GB)...")
     try:
-        print("\n📦 Loading Marker models...")
-        print("This may take a few minutes on first run (downloading ~2-3GB)...")
-        app_data["models"] = create_model_dict()
-        app_data["device"] = device
-        print("✓ Models loaded successfully\n")
+        app_data["models"] = load_marker_models()
+    except Exception as e:
+        raise RuntimeError(f"Failed to load Marker models: {e}") from e
+    app_data["device"] = device
+    # One converter for the app's lifetime: construction re-wires
+    # processors/builders and costs warm-up kernels, all per call.
+    app_data["converter"] = PdfConverter(artifact_dict=app_data["models"])
+    print("✓ Models loaded successfully\n")
+
+    # One-shot warmup: first inference pays cudnn autotune and lazy CUDA
+    # context/kernel-load costs that would otherwise land on the first user
+    # request's p99. A tiny synthetic page touches both pipelines.
+    warmup_start = time.time()
+    try:
+        from PIL import Image, ImageDraw
+        from notes_extractor import _ocr_image_surya  # lazy import
+
+        img = Image.new("RGB", (400, 200), "white")
+        ImageDraw.Draw(img).text((20, 80), "NOTES: 1. WARMUP", fill="black")
+        warmup_pdf = UPLOAD_DIR / f"warmup_{secrets.token_hex(4)}.pdf"
+        img.save(warmup_pdf, "PDF")
+        try:
+            app_data["converter"](str(warmup_pdf))
+            _ocr_image_surya(img, app_data["models"])
+        finally:
+            try:
+                os.remove(warmup_pdf)
+            except Exception:
+                pass
+        print(f"✓ Warmup pass done in {time.time() - warmup_start:.1f}s")
     except Exception as e:
-        print(f"⚠ Warning: Failed to load models: {e}")
-        print("Models will be loaded on first request\n")
+        print(f"⚠ Warmup pass failed (continuing): {e}")
+
+    # Single persistent worker for OCR jobs — spawning a ThreadPoolExecutor
+    # per file just to get a timeout adds thread create/join overhead per item.
+    app_data["executor"] = ThreadPoolExecutor(
+        max_workers=MARKER_WORKERS, thread_name_prefix="marker"
+    )
+    app_data["ocr_cache"] = OrderedDict()
+    app_data["notes_cache"] = OrderedDict()
+    app_data["notes_batcher"] = NotesBatcher(app_data["models"], app_data["executor"])
 
     yield
 
     # Cleanup
     print("\n🛑 Shutting down...")
+    app_data["executor"].shutdown(wait=True)
     if "models" in app_data:
         del app_data["models"]
     if device == "cuda":
@@ -180,13 +626,19 @@ app = FastAPI(
     version=API_VERSION,
     description=API_DESCRIPTION,
     lifespan=lifespan,
+    # orjson serializes the multi-MB batch result payloads in C instead of
+    # pure-Python json.dumps, freeing the event loop sooner.
+    default_response_class=ORJSONResponse,
 )
 
 # CORS
 app.add_middleware(
     CORSMiddleware,
     allow_origins=CORS_ORIGINS,
-    allow_credentials=True,
+    # Credentials force a per-origin echo on every response; with "*" the
+    # middleware can short-circuit to a static wildcard header instead, and
+    # the browser would reject credentialed wildcard responses anyway.
+    allow_credentials=not CORS_ALLOW_ALL,
     allow_methods=["GET", "POST"],
     allow_headers=["Content-Type", "Accept"],
 )
@@ -222,17 +674,32 @@ async def root():
 
 @app.get("/api/health")
 async def health_check():
-    return {
+    info = {
         "status": "healthy",
         "model_loaded": "models" in app_data,
         "device": app_data.get("device", "unknown"),
         "supported_formats": list(ALLOWED_EXTENSIONS),
     }
+    if torch.cuda.is_available():
+        # num_alloc_retries counts allocations that only succeeded after a
+        # forced cache flush — a rising value means pool fragmentation.
+        info["cuda"] = {
+            "memory_allocated": torch.cuda.memory_allocated(),
+            "memory_reserved": torch.cuda.memory_reserved(),
+            "num_alloc_retries": torch.cuda.memory_stats().get(
+                "num_alloc_retries", 0
+            ),
+        }
+    return info
 
 
 @app.post("/api/upload", response_model=OCRResponse)
 async def upload_and_process_file(
     file: UploadFile = File(..., description="PDF or Image file to process"),
+    stream: bool = Query(
+        False,
+        description="Stream large markdown outputs as text/markdown instead of JSON",
+    ),
 ):
     """Upload PDF or Image and convert to Markdown using Marker"""
     file_path = None
@@ -248,24 +715,10 @@ async def upload_and_process_file(
 
         file_type = get_file_type(file.filename)
 
-        # Read file content
-        content = await file.read()
-        file_size = len(content)
-
-        if file_size > MAX_FILE_SIZE:
-            raise HTTPException(status_code=400, detail="File too large (max 50MB)")
-
-        # Validate file content by magic bytes
-        if not validate_file_content(content):
-            raise HTTPException(
-                status_code=400, detail="File content does not match a supported type"
-            )
-
-        # Sanitize filename to prevent path traversal
-        safe_filename = sanitize_filename(file.filename)
-        file_path = UPLOAD_DIR / safe_filename
-        with open(file_path, "wb") as f:
-            f.write(content)
+        # Sanitize filename to prevent path traversal, then stream to disk
+        # (size limit and magic bytes are enforced chunk by chunk)
+        file_path = scratch_path(file.filename)
+        file_size, content_hash = await save_upload(file, file_path)
 
         print(f"\n{'=' * 60}")
         print(
@@ -273,28 +726,70 @@ async def upload_and_process_file(
         )
         print(f"{'=' * 60}")
 
-        # Pre-OCR quality check
-        quality = check_document_quality(str(file_path), file_type)
+        # Pre-OCR quality check — rasterizes the page, so keep it off the
+        # loop. It runs on the marker executor (not the default pool) so its
+        # pdfium render can never overlap Marker's own pdfium use.
+        quality = await asyncio.get_running_loop().run_in_executor(
+            app_data["executor"], check_document_quality, str(file_path), file_type
+        )
         print(f"  Quality — blur={quality['blur_score']} brightness={quality['brightness']} contrast={quality['contrast']}")
         if not quality["passed"]:
             print(f"  ✗ {quality['reason']}")
             raise HTTPException(status_code=422, detail=quality["reason"])
 
-        # Ensure models are loaded
-        if "models" not in app_data:
-            print("Loading models...")
-            app_data["models"] = create_model_dict()
+        # Skip OCR entirely when this exact file body was converted recently
+        cached = cache_get(app_data["ocr_cache"], content_hash)
+        if cached is not None:
+            print("  ✓ Cache hit — skipping OCR")
+            markdown_text = cached
+        else:
+            # Create converter and process, off the event loop so concurrent
+            # requests aren't stalled behind the blocking OCR call.
+            # PdfConverter auto-detects file type and uses appropriate provider
+            def _run_marker(fpath):
+                if file_type == "pdf":
+                    if NATIVE_TEXT_FAST_PATH:
+                        native = extract_native_text(fpath)
+                        if native is not None:
+                            print("  ✓ Embedded text layer found — skipping OCR")
+                            return native, None, None
+                else:
+                    # Images go straight to Surya: PdfConverter would wrap
+                    # them in a synthetic one-page PDF and re-rasterize
+                    # before the layout pass.
+                    from notes_extractor import ocr_image_file  # lazy import
+
+                    print("  ✓ Image upload — running Surya directly")
+                    return ocr_image_file(str(fpath), app_data["models"]), None, None
+                rendered = app_data["converter"](str(fpath))
+                return text_from_rendered(rendered)
 
-        # Create converter and process
-        # PdfConverter auto-detects file type and uses appropriate provider
-        converter = PdfConverter(artifact_dict=app_data["models"])
-        rendered = converter(str(file_path))
-        markdown_text, _, _ = text_from_rendered(rendered)
+            loop = asyncio.get_running_loop()
+            markdown_text, _, _ = await loop.run_in_executor(
+                app_data["executor"], _run_marker, file_path
+            )
+            cache_put(app_data["ocr_cache"], content_hash, markdown_text)
 
         processing_time = time.time() - start_time
 
         print(f"✓ Processing complete in {processing_time:.2f}s\n")
 
+        if stream and len(markdown_text) > LARGE_RESPONSE_THRESHOLD:
+            tmp = tempfile.NamedTemporaryFile(
+                "w",
+                suffix=".md",
+                dir=str(UPLOAD_DIR),
+                delete=False,
+                encoding="utf-8",
+            )
+            tmp.write(markdown_text)
+            tmp.close()
+            return FileResponse(
+                tmp.name,
+                media_type="text/markdown",
+                background=BackgroundTask(os.remove, tmp.name),
+            )
+
         return OCRResponse(
             success=True,
             filename=file.filename,
@@ -319,6 +814,7 @@ async def upload_and_process_file(
                 os.remove(file_path)
             except Exception:
                 pass
+        note_request_done()
 
 
 @app.post("/api/check-quality-batch")
@@ -352,45 +848,35 @@ async def check_quality_batch(
                 })
                 continue
 
-            content = await file.read()
-            file_size = len(content)
-
-            if file_size > MAX_FILE_SIZE:
-                results.append({
-                    "filename": file.filename,
-                    "file_size": file_size,
-                    "passed": False,
-                    "blur_score": 0.0,
-                    "brightness": 0.0,
-                    "contrast": 0.0,
-                    "reason": "File too large (max 50MB)",
-                })
-                continue
-
-            if not validate_file_content(content):
+            file_type = get_file_type(file.filename)
+            file_path = scratch_path(file.filename)
+            try:
+                file_size, _ = await save_upload(file, file_path)
+            except HTTPException as exc:
                 results.append({
                     "filename": file.filename,
-                    "file_size": file_size,
+                    "file_size": 0,
                     "passed": False,
                     "blur_score": 0.0,
                     "brightness": 0.0,
                     "contrast": 0.0,
-                    "reason": "File content does not match a supported type",
+                    "reason": exc.detail,
                 })
                 continue
 
-            file_type = get_file_type(file.filename)
-            safe_filename = sanitize_filename(file.filename)
-            file_path = UPLOAD_DIR / safe_filename
-            with open(file_path, "wb") as f:
-                f.write(content)
-
-            quality = check_document_quality(
-                str(file_path), file_type,
-                sharpness_threshold=min_sharpness,
-                min_brightness=min_brightness,
-                max_brightness=max_brightness,
-                min_contrast=min_contrast,
+            # Same executor routing as /api/upload: the pdfium render must
+            # not run on the event-loop thread while Marker's own pdfium use
+            # may be active on the marker executor.
+            quality = await asyncio.get_running_loop().run_in_executor(
+                app_data["executor"],
+                functools.partial(
+                    check_document_quality,
+                    str(file_path), file_type,
+                    sharpness_threshold=min_sharpness,
+                    min_brightness=min_brightness,
+                    max_brightness=max_brightness,
+                    min_contrast=min_contrast,
+                ),
             )
             results.append({
                 "filename": file.filename,
@@ -443,146 +929,162 @@ async def upload_and_process_batch(
     print(f"📦 Batch processing: {total} file(s)")
     print(f"{'=' * 60}")
 
-    # Ensure models are loaded once
-    if "models" not in app_data:
-        print("Loading models...")
-        app_data["models"] = create_model_dict()
+    # Shared app-lifetime converter (see lifespan) — the marker executor
+    # bounds how many OCR jobs run through it at once.
+    converter = app_data["converter"]
 
-    for idx, file in enumerate(files, 1):
+    async def _handle_file(idx: int, file: UploadFile) -> dict:
         file_path = None
         start_time = time.time()
         try:
             # Validate
             if not is_allowed_file(file.filename):
                 allowed = ", ".join(sorted(ALLOWED_EXTENSIONS))
-                results.append(
-                    {
-                        "success": False,
-                        "filename": file.filename,
-                        "error": f"Unsupported file type. Allowed: {allowed}",
-                    }
-                )
-                continue
-
-            content = await file.read()
-            file_size = len(content)
-
-            if file_size > MAX_FILE_SIZE:
-                results.append(
-                    {
-                        "success": False,
-                        "filename": file.filename,
-                        "error": "File too large (max 50MB)",
-                    }
-                )
-                continue
-
-            if not validate_file_content(content):
-                results.append(
-                    {
-                        "success": False,
-                        "filename": file.filename,
-                        "error": "File content does not match a supported type",
-                    }
-                )
-                continue
+                return {
+                    "success": False,
+                    "filename": file.filename,
+                    "error": f"Unsupported file type. Allowed: {allowed}",
+                }
 
             file_type = get_file_type(file.filename)
-            safe_filename = sanitize_filename(file.filename)
-            file_path = UPLOAD_DIR / safe_filename
-            with open(file_path, "wb") as f:
-                f.write(content)
+            file_path = scratch_path(file.filename)
+            try:
+                file_size, content_hash = await save_upload(file, file_path)
+            except HTTPException as exc:
+                return {
+                    "success": False,
+                    "filename": file.filename,
+                    "error": exc.detail,
+                }
 
             print(
                 f"\n[{idx}/{total}] Processing [{file_type.upper()}]: {file.filename} ({file_size / 1024:.1f} KB)"
             )
 
-            # Pre-OCR quality check
-            quality = check_document_quality(str(file_path), file_type)
+            # Pre-OCR quality check — offloaded to the marker executor.
+            # Running it on the default pool would let its pdfium render
+            # overlap Marker's own pdfium use on another thread, and PDFium
+            # is not thread-safe, so it queues with the OCR jobs instead.
+            quality = await asyncio.get_running_loop().run_in_executor(
+                app_data["executor"], check_document_quality, str(file_path), file_type
+            )
             print(f"  Quality — blur={quality['blur_score']} brightness={quality['brightness']} contrast={quality['contrast']}")
             if not quality["passed"]:
                 if force:
                     print(f"  ⚠ Quality warning (force=true, proceeding): {quality['reason']}")
                 else:
                     print(f"  ✗ {quality['reason']}")
-                    results.append(
-                        {
-                            "success": False,
-                            "filename": file.filename,
-                            "markdown_content": "",
-                            "file_size": file_size,
-                            "processing_time": time.time() - start_time,
-                            "file_type": file_type,
-                            "error": quality["reason"],
-                        }
-                    )
-                    continue
+                    return {
+                        "success": False,
+                        "filename": file.filename,
+                        "markdown_content": "",
+                        "file_size": file_size,
+                        "processing_time": time.time() - start_time,
+                        "file_type": file_type,
+                        "error": quality["reason"],
+                    }
 
             def _process_file(fpath):
-                converter = PdfConverter(artifact_dict=app_data["models"])
+                if file_type == "pdf":
+                    if NATIVE_TEXT_FAST_PATH:
+                        native = extract_native_text(fpath)
+                        if native is not None:
+                            print("  ✓ Embedded text layer found — skipping OCR")
+                            return native, None, None
+                else:
+                    # Same image short-circuit as /api/upload.
+                    from notes_extractor import ocr_image_file  # lazy import
+
+                    print("  ✓ Image upload — running Surya directly")
+                    return ocr_image_file(str(fpath), app_data["models"]), None, None
                 rendered = converter(str(fpath))
                 return text_from_rendered(rendered)
 
-            with ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(_process_file, file_path)
+            cached = cache_get(app_data["ocr_cache"], content_hash)
+            if cached is not None:
+                print("  ✓ Cache hit — skipping OCR")
+                markdown_text = cached
+            else:
+                # Every coroutine submits its job up front while the
+                # single-threaded marker executor drains them one at a time,
+                # so this wait includes queue time behind earlier files.
+                # Scale the deadline by batch size — same treatment as
+                # /api/extract-notes-batch — so tail files of a large batch
+                # aren't failed for time spent queued, only for a batch that
+                # has genuinely stalled.
+                batch_timeout = PER_FILE_TIMEOUT * total
+                future = app_data["executor"].submit(_process_file, file_path)
                 try:
-                    markdown_text, _, _ = future.result(timeout=PER_FILE_TIMEOUT)
-                except FuturesTimeoutError:
+                    markdown_text, _, _ = await asyncio.wait_for(
+                        asyncio.wrap_future(future), timeout=batch_timeout
+                    )
+                except asyncio.TimeoutError:
                     future.cancel()
                     processing_time = time.time() - start_time
                     print(
-                        f"  ✗ Timeout after {processing_time:.0f}s (limit: {PER_FILE_TIMEOUT}s)"
+                        f"  ✗ Timeout after {processing_time:.0f}s (limit: {batch_timeout}s)"
                     )
-                    results.append(
-                        {
-                            "success": False,
-                            "filename": file.filename,
-                            "markdown_content": "",
-                            "file_size": file_size,
-                            "processing_time": processing_time,
-                            "file_type": file_type,
-                            "error": f"Processing timed out after {PER_FILE_TIMEOUT}s",
-                        }
-                    )
-                    continue
+                    return {
+                        "success": False,
+                        "filename": file.filename,
+                        "markdown_content": "",
+                        "file_size": file_size,
+                        "processing_time": processing_time,
+                        "file_type": file_type,
+                        "error": f"Processing timed out after {batch_timeout}s",
+                    }
+                cache_put(app_data["ocr_cache"], content_hash, markdown_text)
 
             processing_time = time.time() - start_time
             print(f"  ✓ Done in {processing_time:.2f}s")
 
-            results.append(
-                {
-                    "success": True,
-                    "filename": file.filename,
-                    "markdown_content": markdown_text,
-                    "file_size": file_size,
-                    "processing_time": processing_time,
-                    "file_type": file_type,
-                    "error": "",
-                    "blur_score": quality["blur_score"],
-                    "brightness": quality["brightness"],
-                    "contrast": quality["contrast"],
-                }
-            )
+            return {
+                "success": True,
+                "filename": file.filename,
+                "markdown_content": markdown_text,
+                "file_size": file_size,
+                "processing_time": processing_time,
+                "file_type": file_type,
+                "error": "",
+                "blur_score": quality["blur_score"],
+                "brightness": quality["brightness"],
+                "contrast": quality["contrast"],
+            }
         except Exception as e:
             processing_time = time.time() - start_time
             print(f"  ✗ Error: {e}")
-            results.append(
-                {
-                    "success": False,
-                    "filename": file.filename or f"file_{idx}",
-                    "markdown_content": "",
-                    "file_size": 0,
-                    "processing_time": processing_time,
-                    "file_type": "",
-                    "error": "Processing failed",
-                }
-            )
+            return {
+                "success": False,
+                "filename": file.filename or f"file_{idx}",
+                "markdown_content": "",
+                "file_size": 0,
+                "processing_time": processing_time,
+                "file_type": "",
+                "error": "Processing failed",
+            }
         finally:
             if file_path and file_path.exists():
                 try:
                     os.remove(file_path)
                 except Exception:
                     pass
+            # Counts toward the periodic gc sweep and reclaims fragmented
+            # CUDA allocations when pool slack builds up, so long batches
+            # don't hit spurious OOMs with room left in the pool.
+            note_request_done()
+            maybe_empty_cuda_cache()
+
+    # All files run as concurrent coroutines: the single-threaded marker
+    # executor runs one OCR job at a time, and
+    # streaming file N+1 to disk overlaps GPU OCR of file N. The quality
+    # check queues on the marker executor rather than overlapping (PDFium
+    # is not thread-safe), so the remaining overlap is upload I/O vs OCR.
+    # gather() preserves input order in its result list.
+    results = list(
+        await asyncio.gather(
+            *(_handle_file(idx, file) for idx, file in enumerate(files, 1))
+        )
+    )
 
     succeeded = sum(1 for r in results if r["success"])
     print(f"\n📦 Batch complete: {succeeded}/{total} succeeded")
@@ -606,10 +1108,8 @@ async def extract_notes_single(
 
     Runs the full Marker OCR pipeline on the first page, locates the Notes
     block in the right-upper region, and returns the recognised text plus an
-    optional cropped PNG for visual verification.
+    optional cropped JPEG for visual verification.
     """
-    from notes_extractor import extract_notes_from_pdf  # lazy import
-
     file_path = None
     start_time = time.time()
 
@@ -621,35 +1121,31 @@ async def extract_notes_single(
                 detail=f"Unsupported file type. Allowed: {allowed}",
             )
 
-        content = await file.read()
-        file_size = len(content)
-
-        if file_size > MAX_FILE_SIZE:
-            raise HTTPException(status_code=400, detail="File too large (max 50MB)")
-
-        if not validate_file_content(content):
-            raise HTTPException(
-                status_code=400, detail="File content does not match a supported type"
-            )
-
-        safe_filename = sanitize_filename(file.filename)
-        file_path = UPLOAD_DIR / safe_filename
-        with open(file_path, "wb") as f:
-            f.write(content)
+        file_path = scratch_path(file.filename)
+        file_size, content_hash = await save_upload(file, file_path)
 
         print(f"\n{'=' * 60}")
         print(f"Extracting Notes from: {file.filename} ({file_size / 1024:.1f} KB)")
         print(f"{'=' * 60}")
 
-        if "models" not in app_data:
-            print("Loading models...")
-            app_data["models"] = create_model_dict()
-
-        result = extract_notes_from_pdf(
-            str(file_path),
-            app_data["models"],
-            include_crop_image=include_image,
-        )
+        # Same content-hash cache idea as /api/upload: identical bytes skip
+        # OCR entirely. A cached entry without a crop preview can't serve an
+        # include_image request, so that combination falls through as a miss.
+        cached = cache_get(app_data["notes_cache"], content_hash)
+        if cached is not None and (cached.get("crop_image_b64") or not include_image):
+            print("✓ Cache hit — returning previous extraction")
+            result = dict(cached)
+            if not include_image:
+                result["crop_image_b64"] = None
+        else:
+            # The batcher coalesces co-arriving requests into one Surya call
+            # and runs it on the marker executor, keeping the event loop free.
+            result = await app_data["notes_batcher"].extract(file_path, include_image)
+            if result.get("success"):
+                cache_put(
+                    app_data["notes_cache"], content_hash, dict(result),
+                    OCR_CACHE_SIZE,
+                )
 
         processing_time = time.time() - start_time
         result["filename"] = file.filename
@@ -674,6 +1170,7 @@ async def extract_notes_single(
                 os.remove(file_path)
             except Exception:
                 pass
+        note_request_done()
 
 
 @app.post("/api/extract-notes-batch")
@@ -686,9 +1183,11 @@ async def extract_notes_batch(
     """
     Extract the 'Notes:' section from multiple engineering drawing PDFs.
 
-    Files are processed sequentially; models are loaded once and reused.
+    All first pages are cropped up front, then detection and recognition run
+    once over the whole stack of crops (see extract_notes_from_pdfs) instead
+    of file by file, so the GPU sees one large batch.
     """
-    from notes_extractor import extract_notes_from_pdf  # lazy import
+    from notes_extractor import extract_notes_from_pdfs  # lazy import
 
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
@@ -699,138 +1198,142 @@ async def extract_notes_batch(
             detail=f"Too many files. Maximum {MAX_BATCH_FILES} files per request.",
         )
 
-    results = []
     total = len(files)
 
     print(f"\n{'=' * 60}")
     print(f"Notes batch extraction: {total} file(s)")
     print(f"{'=' * 60}")
 
-    if "models" not in app_data:
-        print("Loading models...")
-        app_data["models"] = create_model_dict()
+    def _error_result(filename, error, file_size=0):
+        return {
+            "success": False,
+            "filename": filename,
+            "notes_text": None,
+            "crop_image_b64": None,
+            "crop_bbox": None,
+            "error": error,
+            "processing_time": 0.0,
+            "file_size": file_size,
+        }
+
+    # ── Phase 1: validate and save every upload ────────────────────────────
+    results_by_idx = {}
+    pending = []  # (idx, filename, file_path, file_size, content_hash)
 
     for idx, file in enumerate(files, 1):
         file_path = None
-        start_time = time.time()
-
+        queued = False
         try:
             if not is_allowed_file(file.filename):
                 allowed = ", ".join(sorted(ALLOWED_EXTENSIONS))
-                results.append(
-                    {
-                        "success": False,
-                        "filename": file.filename,
-                        "notes_text": None,
-                        "crop_image_b64": None,
-                        "crop_bbox": None,
-                        "error": f"Unsupported file type. Allowed: {allowed}",
-                        "processing_time": 0.0,
-                        "file_size": 0,
-                    }
+                results_by_idx[idx] = _error_result(
+                    file.filename, f"Unsupported file type. Allowed: {allowed}"
                 )
                 continue
 
-            content = await file.read()
-            file_size = len(content)
-
-            if file_size > MAX_FILE_SIZE:
-                results.append(
-                    {
-                        "success": False,
-                        "filename": file.filename,
-                        "notes_text": None,
-                        "crop_image_b64": None,
-                        "crop_bbox": None,
-                        "error": "File too large (max 50MB)",
-                        "processing_time": 0.0,
-                        "file_size": file_size,
-                    }
-                )
-                continue
-
-            if not validate_file_content(content):
-                results.append(
-                    {
-                        "success": False,
-                        "filename": file.filename,
-                        "notes_text": None,
-                        "crop_image_b64": None,
-                        "crop_bbox": None,
-                        "error": "File content does not match a supported type",
-                        "processing_time": 0.0,
-                        "file_size": file_size,
-                    }
-                )
+            file_path = scratch_path(file.filename)
+            try:
+                file_size, content_hash = await save_upload(file, file_path)
+            except HTTPException as exc:
+                results_by_idx[idx] = _error_result(file.filename, exc.detail)
                 continue
 
-            safe_filename = sanitize_filename(file.filename)
-            file_path = UPLOAD_DIR / safe_filename
-            with open(file_path, "wb") as f:
-                f.write(content)
-
             print(f"\n[{idx}/{total}] {file.filename} ({file_size / 1024:.1f} KB)")
 
-            def _extract(fpath):
-                return extract_notes_from_pdf(
-                    str(fpath),
-                    app_data["models"],
-                    include_crop_image=include_image,
-                )
+            cached = cache_get(app_data["notes_cache"], content_hash)
+            if cached is not None and (
+                cached.get("crop_image_b64") or not include_image
+            ):
+                print("  ✓ Cache hit — skipping OCR")
+                result = dict(cached)
+                if not include_image:
+                    result["crop_image_b64"] = None
+                result["filename"] = file.filename
+                result["processing_time"] = 0.0
+                result["file_size"] = file_size
+                results_by_idx[idx] = result
+                continue
 
-            with ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(_extract, file_path)
+            pending.append((idx, file.filename, file_path, file_size, content_hash))
+            queued = True
+        except Exception as e:
+            print(f"  ✗ Error: {e}")
+            results_by_idx[idx] = _error_result(
+                getattr(file, "filename", f"file_{idx}"), "Processing failed"
+            )
+        finally:
+            # Files that reached phase 2 are removed there; anything else —
+            # cache hits, failed saves (save_upload only unlinks on the
+            # HTTPException branch), or a throw after a successful save —
+            # must be cleaned here or the scratch file leaks in tmpfs.
+            if not queued and file_path is not None and file_path.exists():
                 try:
-                    result = future.result(timeout=PER_FILE_TIMEOUT)
-                except FuturesTimeoutError:
-                    future.cancel()
-                    processing_time = time.time() - start_time
-                    print(f"  ✗ Timeout after {processing_time:.0f}s")
-                    results.append(
-                        {
-                            "success": False,
-                            "filename": file.filename,
-                            "notes_text": None,
-                            "crop_image_b64": None,
-                            "crop_bbox": None,
-                            "error": f"Processing timed out after {PER_FILE_TIMEOUT}s",
-                            "processing_time": processing_time,
-                            "file_size": file_size,
-                        }
-                    )
-                    continue
+                    os.remove(file_path)
+                except Exception:
+                    pass
 
-            processing_time = time.time() - start_time
-            result["filename"] = file.filename
-            result["processing_time"] = processing_time
-            result["file_size"] = file_size
+    # ── Phase 2: one batched extraction over all saved files ───────────────
+    if pending:
+        batch_start = time.time()
+        batch_timeout = PER_FILE_TIMEOUT * len(pending)
 
-            status = "✓" if result["success"] else "✗"
-            print(f"  {status} Done in {processing_time:.2f}s")
-            results.append(result)
+        def _extract_batch(paths):
+            return extract_notes_from_pdfs(
+                paths,
+                app_data["models"],
+                include_crop_image=include_image,
+            )
 
+        future = app_data["executor"].submit(
+            _extract_batch, [str(p[2]) for p in pending]
+        )
+        try:
+            batch_results = await asyncio.wait_for(
+                asyncio.wrap_future(future), timeout=batch_timeout
+            )
+        except asyncio.TimeoutError:
+            future.cancel()
+            print(f"  ✗ Timeout after {time.time() - batch_start:.0f}s")
+            batch_results = [
+                _error_result(
+                    filename, f"Processing timed out after {batch_timeout}s", file_size
+                )
+                for _, filename, _, file_size, _ in pending
+            ]
         except Exception as e:
-            processing_time = time.time() - start_time
             print(f"  ✗ Error: {e}")
-            results.append(
-                {
-                    "success": False,
-                    "filename": getattr(file, "filename", f"file_{idx}"),
-                    "notes_text": None,
-                    "crop_image_b64": None,
-                    "crop_bbox": None,
-                    "error": "Processing failed",
-                    "processing_time": processing_time,
-                    "file_size": 0,
-                }
-            )
-        finally:
-            if file_path and file_path.exists():
+            batch_results = [
+                _error_result(filename, "Processing failed", file_size)
+                for _, filename, _, file_size, _ in pending
+            ]
+
+        # Batched processing has no meaningful per-file wall time; report the
+        # batch average so the field stays comparable with single extraction.
+        per_file_time = (time.time() - batch_start) / len(pending)
+        for (idx, filename, file_path, file_size, content_hash), result in zip(
+            pending, batch_results
+        ):
+            if result.get("success"):
+                cache_put(
+                    app_data["notes_cache"], content_hash, dict(result),
+                    OCR_CACHE_SIZE,
+                )
+            result["filename"] = filename
+            result["processing_time"] = per_file_time
+            result["file_size"] = file_size
+            status = "✓" if result["success"] else "✗"
+            print(f"  {status} {filename}")
+            results_by_idx[idx] = result
+            if file_path.exists():
                 try:
                     os.remove(file_path)
                 except Exception:
                     pass
 
+        note_request_done()
+        maybe_empty_cuda_cache()
+
+    results = [results_by_idx[idx] for idx in sorted(results_by_idx)]
     succeeded = sum(1 for r in results if r["success"])
     print(f"\nBatch complete: {succeeded}/{total} succeeded")
     return {"results": results, "total": total, "succeeded": succeeded}
@@ -841,4 +1344,19 @@ if __name__ == "__main__":
 
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "8001"))
-    uvicorn.run("main:app", host=host, port=port, reload=True)
+
+    if os.getenv("DEV_RELOAD", "0") == "1":
+        # Dev only: the inotify watcher forces single-worker mode and every
+        # code change reloads the multi-GB models.
+        uvicorn.run("main:app", host=host, port=port, reload=True)
+    else:
+        # Each worker is a forked process running its own lifespan, so every
+        # worker loads its own model copy — size WORKERS to VRAM (roughly
+        # one worker per 4-5 GB free). uvicorn[standard] picks uvloop and
+        # httptools automatically.
+        uvicorn.run(
+            "main:app",
+            host=host,
+            port=port,
+            workers=int(os.getenv("WORKERS", "1")),
+        )
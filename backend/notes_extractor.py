@@ -46,11 +46,37 @@ Template parameters (fraction of page size)
 
 import base64
 import io
+
+try:
+    # SIMD base64 (SSSE3/AVX2) — same API as the stdlib, ~4-10x faster on the
+    # multi-hundred-KB JPEG previews. Fall back silently when not installed.
+    import pybase64 as _b64
+except ImportError:  # pragma: no cover
+    _b64 = base64
+
+try:
+    # libjpeg-turbo encoder for the crop previews: takes the ndarray directly
+    # and uses SIMD JPEG paths, ~2-6x faster than PIL's save(). Broad except
+    # because TurboJPEG() also raises when the native library is missing.
+    from turbojpeg import TJPF_RGB, TurboJPEG
+
+    _turbo = TurboJPEG()
+except Exception:  # pragma: no cover
+    _turbo = None
+import os
 import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from typing import Tuple
 
+import numpy as np
 import pypdfium2 as pdfium
+import torch
 from PIL import Image
+from surya.common.surya.schema import TaskNames
+
+from pdfium_lock import PDFIUM_LOCK
 
 # ---------------------------------------------------------------------------
 # Template crop parameters — tune per orientation
@@ -71,14 +97,50 @@ PORT_X_MAX = 0.73  # Notes right edge — extended from 0.65; some drawings have
 PORT_Y_MIN = 0.05  # Notes top  — 0.02 was too high (captured Drawing NO. header row)
 PORT_Y_MAX = 0.40  # Notes text bottom — reduced from 0.44 to avoid spec-table rows leaking in
 
+# Indexed by is_portrait so the render path picks orientation + template with
+# one comparison instead of a string compare against "landscape".
+_CROP_TEMPLATES = (
+    (LAND_X_MIN, LAND_X_MAX, LAND_Y_MIN, LAND_Y_MAX),
+    (PORT_X_MIN, PORT_X_MAX, PORT_Y_MIN, PORT_Y_MAX),
+)
+_ORIENTATIONS = ("landscape", "portrait")
+
 # Render DPI for the crop image sent to OCR.
 RENDER_DPI = 150
 
+# First-pass render DPI. Surya's recognizer rescales line crops to a fixed
+# internal height, so most drawings read fine from a 96 DPI render at roughly
+# half the pdfium rasterization cost of 150 DPI. Pages that yield fewer than
+# MIN_NOTES_LINES text lines are re-rendered at RENDER_DPI as a fallback
+# (tiny annotation text can drop below the detector's threshold at 96 DPI).
+FAST_RENDER_DPI = 96
+MIN_NOTES_LINES = 2
+
 # If the crop still exceeds this pixel count on either axis, resize down.
 MAX_CROP_PIXELS = 1200
 
 # Minimum Surya detection confidence to keep a text-line bbox.
-MIN_DET_CONFIDENCE = 0.5
+MIN_DET_CONFIDENCE = float(os.getenv("MIN_DET_CONFIDENCE", "0.5"))
+
+# Upper bounds for Surya batch sizes. Surya sizes its per-batch VRAM arenas
+# from the batch size, so the actual call sites clamp these to the number of
+# images/lines in hand — a 6-line notes crop shouldn't reserve a 16-wide
+# arena. Env-tunable so low-VRAM hosts can clamp further without code edits.
+DET_BATCH = int(os.getenv("DET_BATCH", "16"))
+RECOGNITION_BATCH = int(os.getenv("RECOGNITION_BATCH", "16"))
+
+# Recognition decode limits. Notes lines are short plain text (a title plus
+# ≤20 numbered items), so the generous defaults we launched with
+# (max_sliding_window=2148, max_tokens=2048, math_mode) just inflated the
+# autoregressive decode budget per line. 256 tokens comfortably covers the
+# longest note line seen in real drawings; math_mode stays off because notes
+# never contain LaTeX.
+REC_MAX_SLIDING_WINDOW = 512
+REC_MAX_TOKENS = 256
+
+# Run Surya inference under CUDA autocast (mixed precision). OCR models are
+# robust under AMP; set OCR_AMP=0 to force full precision.
+OCR_AMP = os.getenv("OCR_AMP", "1") == "1"
 
 
 # ---------------------------------------------------------------------------
@@ -86,45 +148,169 @@ MIN_DET_CONFIDENCE = 0.5
 # ---------------------------------------------------------------------------
 
 
-def _render_page(pdf_path: str, page_idx: int, dpi: int) -> Image.Image:
-    """Render one PDF page to a PIL Image at *dpi* resolution."""
-    doc = pdfium.PdfDocument(str(pdf_path))
-    try:
-        page = doc[page_idx]
-        return page.render(scale=float(dpi) / 72.0).to_pil()
-    finally:
-        doc.close()
+@contextmanager
+def _inference_ctx():
+    """
+    Context for Surya det/rec calls: inference_mode (cheaper than no_grad —
+    no version-counter bookkeeping) plus CUDA autocast when available.
+    bfloat16 is preferred on Ampere+ for its FP32-sized exponent range;
+    older GPUs fall back to float16. CPU deployments and OCR_AMP=0 run the
+    predictors at their native precision.
+    """
+    with torch.inference_mode():
+        if OCR_AMP and torch.cuda.is_available():
+            amp_dtype = (
+                torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+            )
+            with torch.autocast(device_type="cuda", dtype=amp_dtype):
+                yield
+        else:
+            yield
 
 
-def _detect_orientation(image: Image.Image) -> str:
-    """Return 'landscape' if width > height, else 'portrait'."""
-    w, h = image.size
-    return "landscape" if w > h else "portrait"
+# Rendered-crop LRU keyed by (path, mtime, page_idx, dpi). Uploads land on
+# single-use scratch paths, so this mostly pays off on pipeline re-entry
+# over persistent files; mtime in the key makes stale hits impossible. The
+# cached arrays are treated as read-only.
+_PAGE_CACHE_SIZE = 8
+_page_cache = OrderedDict()
+_page_cache_lock = threading.Lock()  # renders run on executor threads
 
 
-def _crop_notes_region(
-    page_image: Image.Image,
-    x_min: float,
-    x_max: float,
-    y_min: float,
-    y_max: float,
-) -> Tuple[Image.Image, Tuple[int, int, int, int]]:
+@contextmanager
+def open_pdf(pdf_path: str):
     """
-    Crop the Notes text region from a rendered page image.
-    Returns ``(cropped_image, (x0, y0, x1, y1))`` in pixels.
+    Open a pdfium document once for a whole request scope.
+
+    Parsing costs ~30-100 ms per MB of PDF; callers that render the same
+    file more than once (e.g. the adaptive-DPI retry) should open the
+    document here and pass it down via the ``doc`` kwargs instead of paying
+    a reparse per render.
+
+    The file is handed to pdfium as an open binary file object rather than a
+    path, so pdfium reads through our fd (and the OS page cache) instead of
+    issuing its own open — repeat opens of a warm upload touch no disk. An
+    mmap would be marginally nicer but pypdfium2's buffer check requires
+    ``readinto``, which mmap objects don't implement; a plain file object
+    satisfies it. The file must outlive the document, so it closes after the
+    document, and both are scoped to this context.
     """
-    w, h = page_image.size
-    x0 = int(w * x_min)
-    y0 = int(h * y_min)
-    x1 = int(w * x_max)
-    y1 = int(h * y_max)
-    return page_image.crop((x0, y0, x1, y1)), (x0, y0, x1, y1)
+    fh = open(str(pdf_path), "rb")
+    try:
+        with PDFIUM_LOCK:  # parse is a pdfium call; PDFium is not thread-safe
+            doc = pdfium.PdfDocument(fh)
+    except Exception:
+        fh.close()
+        raise
+    try:
+        yield doc
+    finally:
+        with PDFIUM_LOCK:
+            doc.close()
+        fh.close()
+
+
+def _render_notes_crop(
+    pdf_path: str, page_idx: int, dpi: int, doc=None
+) -> Tuple[np.ndarray, Tuple[int, int, int, int], str]:
+    """
+    Render only the Notes region of a page as an RGB numpy array.
+
+    Orientation comes from the page box (``page.get_size()``), so the crop
+    rectangle is known before rasterizing and can be handed to pdfium as a
+    clip (``crop=``): only ~30 % of the page is rasterized instead of
+    rendering everything and slicing. Returns
+    ``(crop_array, (x0, y0, x1, y1), orientation)`` with the bbox in
+    full-page pixel coordinates at *dpi* (same convention as before).
+
+    When *doc* is given it is used as the already-parsed document and left
+    open for the caller; otherwise the file is opened and closed here.
+    Results are cached in a small mtime-keyed LRU so re-renders of an
+    unchanged page skip parse and raster entirely.
+    """
+    try:
+        mtime = os.path.getmtime(pdf_path)
+    except OSError:
+        mtime = None  # uncacheable; render directly
+    key = (str(pdf_path), mtime, page_idx, dpi)
+
+    if mtime is not None:
+        with _page_cache_lock:
+            cached = _page_cache.get(key)
+            if cached is not None:
+                _page_cache.move_to_end(key)
+                return cached
+
+    def _do(d):
+        page = d[page_idx]
+        page_w, page_h = page.get_size()  # points
+        is_portrait = page_h >= page_w
+        orientation = _ORIENTATIONS[is_portrait]
+        x_min, x_max, y_min, y_max = _CROP_TEMPLATES[is_portrait]
+
+        # Cap the render scale so the crop comes out of pdfium at or below
+        # MAX_CROP_PIXELS directly — rendering at 150 DPI and then
+        # downscaling in _limit_size was a wasted resampling pass over the
+        # full crop. _limit_size stays as a cheap no-op guard downstream.
+        scale = float(dpi) / 72.0
+        crop_w_pt = (x_max - x_min) * page_w
+        crop_h_pt = (y_max - y_min) * page_h
+        max_crop_pt = max(crop_w_pt, crop_h_pt)
+        if max_crop_pt * scale > MAX_CROP_PIXELS:
+            scale = MAX_CROP_PIXELS / max_crop_pt
+
+        # pdfium's crop is the amount cut from each side, in points, with a
+        # bottom-left origin — our y fractions are measured from the top.
+        crop_pts = (
+            page_w * x_min,          # left
+            page_h * (1.0 - y_max),  # bottom
+            page_w * (1.0 - x_max),  # right
+            page_h * y_min,          # top
+        )
+        arr = page.render(
+            scale=scale, crop=crop_pts, rev_byteorder=True
+        ).to_numpy()
+
+        # bbox in full-page pixel coordinates (top-left origin), matching
+        # what the old full-page render + slice reported.
+        w_px = int(page_w * scale)
+        h_px = int(page_h * scale)
+        bbox = (
+            int(w_px * x_min),
+            int(h_px * y_min),
+            int(w_px * x_max),
+            int(h_px * y_max),
+        )
+        return arr, bbox, orientation
+
+    # _do is all pdfium calls (get_size/render/to_numpy) — hold the
+    # process-wide lock so renders can't overlap pdfium work on other threads.
+    if doc is not None:
+        with PDFIUM_LOCK:
+            result = _do(doc)
+    else:
+        with open_pdf(pdf_path) as owned:
+            with PDFIUM_LOCK:
+                result = _do(owned)
+
+    if mtime is not None:
+        with _page_cache_lock:
+            _page_cache[key] = result
+            _page_cache.move_to_end(key)
+            while len(_page_cache) > _PAGE_CACHE_SIZE:
+                _page_cache.popitem(last=False)
+    return result
 
 
 def _limit_size(image: Image.Image, max_pixels: int = MAX_CROP_PIXELS) -> Image.Image:
     """
     Proportionally downscale *image* if either dimension exceeds *max_pixels*.
     Prevents GPU memory issues when the crop is unusually large.
+
+    BILINEAR rather than LANCZOS: the result only feeds Surya (which rescales
+    line crops internally anyway) and the JPEG preview, where the 8-tap sinc
+    kernel buys nothing visible over the ~3-4x cheaper 2-tap filter. PDF crops
+    already render at capped scale, so this mostly runs on image uploads.
     """
     w, h = image.size
     if w <= max_pixels and h <= max_pixels:
@@ -132,10 +318,72 @@ def _limit_size(image: Image.Image, max_pixels: int = MAX_CROP_PIXELS) -> Image.
     scale = min(max_pixels / w, max_pixels / h)
     new_w = max(1, int(w * scale))
     new_h = max(1, int(h * scale))
-    resample = getattr(Image, "Resampling", Image).LANCZOS
+    resample = getattr(Image, "Resampling", Image).BILINEAR
     return image.resize((new_w, new_h), resample)
 
 
+def _has_ink(image: Image.Image) -> bool:
+    """
+    Cheap decision-at-the-door check for visibly blank crops.
+
+    Some drawings have an empty Notes region (or the template misses the
+    text entirely); running Surya detection+recognition on a white rectangle
+    still costs a full GPU pass. A blank crop has near-zero grayscale
+    variance and essentially no dark pixels, so either signal alone is a
+    safe go-ahead; both must fail to skip OCR.
+    """
+    arr = np.asarray(image.convert("L"))
+    # std < 5: uniform background (white or light gray scan).
+    # dark fraction < 0.2 %: fewer dark pixels than a single short word.
+    return arr.std() >= 5.0 or (arr < 128).mean() >= 0.002
+
+
+def _filter_sorted_polygons(det_result, crop_w: int, max_col_frac=None) -> list:
+    """
+    Turn a Surya detection result into a reading-order polygon list.
+
+    Drops bboxes below MIN_DET_CONFIDENCE and — when *max_col_frac* is set —
+    bboxes whose centre-X falls in the right (1-max_col_frac) portion of the
+    crop (spec-table columns). Polygons are sorted top-to-bottom by their
+    topmost Y so recognition output follows the visual reading order
+    (Notes: → 1 → 2 → …). Surya's own sort_lines can mis-order lines in
+    complex portrait layouts, so we sort here and pass sort_lines=False.
+    """
+    n_boxes = len(det_result.bboxes)
+    skipped_spatial = 0
+    if n_boxes == 0:
+        polygons = []
+    else:
+        # Vectorized filter + sort: one (N, 4, 2) array instead of per-bbox
+        # Python loops — with hundreds of detections the interpreter overhead
+        # of sum()/min() comprehensions dominates this path.
+        poly_arr = np.asarray([b.polygon for b in det_result.bboxes], dtype=np.int32)
+        confs = np.fromiter(
+            (b.confidence for b in det_result.bboxes), dtype=np.float32, count=n_boxes
+        )
+        keep = confs >= MIN_DET_CONFIDENCE
+        if max_col_frac is not None:
+            in_col = poly_arr[:, :, 0].mean(axis=1) <= max_col_frac * crop_w
+            skipped_spatial = int(np.count_nonzero(keep & ~in_col))
+            keep &= in_col
+        kept = poly_arr[keep]
+        # Reading order: topmost Y first, leftmost X as tie-breaker
+        # (lexsort takes keys in reverse priority order).
+        order = np.lexsort((kept[:, :, 0].min(axis=1), kept[:, :, 1].min(axis=1)))
+        polygons = kept[order].tolist()
+
+    spatial_note = (
+        f", {skipped_spatial} dropped (centre_x>{max_col_frac:.0%})"
+        if max_col_frac is not None
+        else ""
+    )
+    print(
+        f"[Notes] Surya detected {n_boxes} boxes → "
+        f"{len(polygons)} kept (conf≥{MIN_DET_CONFIDENCE}{spatial_note})"
+    )
+    return polygons
+
+
 def _ocr_image_surya(
     crop_image: Image.Image,
     models: dict,
@@ -165,9 +413,11 @@ def _ocr_image_surya(
     2. Filter by confidence AND optional centre-X spatial guard.
     3. Call ``recognition_model`` with the remaining polygons.
     4. Collect and return the recognised text lines joined by newline.
-    """
-    from surya.common.surya.schema import TaskNames
 
+    Both predictors take PIL images and do their own tensor conversion and
+    host→device staging internally, so there is no seam here to hand them a
+    pre-pinned buffer without patching surya.
+    """
     det_model = models.get("detection_model")
     rec_model = models.get("recognition_model")
 
@@ -177,60 +427,36 @@ def _ocr_image_surya(
             "Make sure create_model_dict() was called before extract_notes_from_pdf()."
         )
 
+    # ── Step 0: skip OCR entirely when the crop is visibly blank ───────────
+    if not _has_ink(crop_image):
+        print("[Notes] Crop has no ink — skipping OCR")
+        return ""
+
     # ── Step 1: detect text lines ──────────────────────────────────────────
-    det_results = det_model(images=[crop_image], batch_size=4)
+    with _inference_ctx():
+        det_results = det_model(images=[crop_image], batch_size=1)
     det_result = det_results[0]
 
-    crop_w = crop_image.size[0]
-
     # ── Step 2: filter by confidence + optional spatial guard ──────────────
-    # Spatial guard: bboxes whose centre-X is in the right (1-max_col_frac)
-    # portion of the crop are spec-table columns → skip them.
-    polygons = []
-    skipped_spatial = 0
-    for bbox in det_result.bboxes:
-        if bbox.confidence < MIN_DET_CONFIDENCE:
-            continue
-        if max_col_frac is not None:
-            xs = [p[0] for p in bbox.polygon]
-            centre_x = sum(xs) / len(xs)
-            if centre_x > max_col_frac * crop_w:
-                skipped_spatial += 1
-                continue
-        polygons.append([[int(p[0]), int(p[1])] for p in bbox.polygon])
-
-    # Sort polygons top-to-bottom by their topmost Y coordinate so that the
-    # recognition output follows the visual reading order (Notes: → 1 → 2 → …).
-    # Surya's own sort_lines can mis-order lines in complex portrait layouts,
-    # so we sort here and pass sort_lines=False to preserve our order.
-    polygons.sort(key=lambda poly: (min(p[1] for p in poly), min(p[0] for p in poly)))
-
-    spatial_note = (
-        f", {skipped_spatial} dropped (centre_x>{max_col_frac:.0%})"
-        if max_col_frac is not None
-        else ""
-    )
-    print(
-        f"[Notes] Surya detected {len(det_result.bboxes)} boxes → "
-        f"{len(polygons)} kept (conf≥{MIN_DET_CONFIDENCE}{spatial_note})"
-    )
+    polygons = _filter_sorted_polygons(det_result, crop_image.size[0], max_col_frac)
 
     if not polygons:
         return ""
 
     # ── Step 3: recognise text in each detected region ─────────────────────
-    rec_results = rec_model(
-        images=[crop_image],
-        task_names=[TaskNames.ocr_with_boxes],
-        polygons=[polygons],
-        input_text=[[""] * len(polygons)],
-        recognition_batch_size=16,
-        sort_lines=False,  # polygons are pre-sorted top-to-bottom; preserve order
-        math_mode=True,
-        drop_repeated_text=False,
-        max_sliding_window=2148,
-        max_tokens=2048,
-    )
+    with _inference_ctx():
+        rec_results = rec_model(
+            images=[crop_image],
+            task_names=[TaskNames.ocr_with_boxes],
+            polygons=[polygons],
+            input_text=[[""] * len(polygons)],
+            recognition_batch_size=min(RECOGNITION_BATCH, max(1, len(polygons))),
+            sort_lines=False,  # polygons are pre-sorted top-to-bottom; preserve order
+            math_mode=False,
+            drop_repeated_text=False,
+            max_sliding_window=REC_MAX_SLIDING_WINDOW,
+            max_tokens=REC_MAX_TOKENS,
+        )
 
     # ── Step 4: collect non-empty text lines ───────────────────────────────
     lines = []
@@ -244,10 +470,79 @@ def _ocr_image_surya(
 
 
 def _to_b64(image: Image.Image) -> str:
-    """Encode a PIL Image as a base64 PNG string."""
+    """Encode a PIL Image as a base64 JPEG string.
+
+    JPEG instead of PNG: the crop preview is purely for visual verification,
+    and PNG's deflate pass was the CPU hotspot on large crops while inflating
+    the JSON payload ~5-10x. quality=80 keeps text in the preview readable;
+    optimize stays off because its extra Huffman pass doubles encode time.
+    """
+    if _turbo is not None:
+        jpeg = _turbo.encode(
+            np.asarray(image.convert("RGB")), quality=80, pixel_format=TJPF_RGB
+        )
+        return _b64.b64encode(jpeg).decode("ascii")
     buf = io.BytesIO()
-    image.save(buf, format="PNG")
-    return base64.b64encode(buf.getvalue()).decode("utf-8")
+    image.convert("RGB").save(buf, format="JPEG", quality=80)
+    # getbuffer() hands the encoder a view of the BytesIO backing store instead
+    # of copying it out via getvalue(); base64 output is pure ASCII.
+    return _b64.b64encode(buf.getbuffer()).decode("ascii")
+
+
+# ---------------------------------------------------------------------------
+# Compiled patterns for _clean_notes_text — hoisted to module level so each
+# call doesn't re-parse ~10 regex literals (and re-compile the two big noise
+# patterns, which used to be built inside the function on every invocation).
+# ---------------------------------------------------------------------------
+
+_WS_RE = re.compile(r"\s+")
+_DRAWING_NO_RE = re.compile(r"Drawing\s*N(?:O|o)\.?")
+_NON_WORD_RE = re.compile(r"[\W_]+")
+# Positive character class: joining findall() matches extracts the key in one
+# pass, which beats the old negated-class sub("") on these short lines.
+_DEDUP_KEY_RE = re.compile(r"[0-9A-Za-z一-鿿]+")
+_NOTES_HDR_RE = re.compile(r"\bNotes\s*:", re.IGNORECASE)
+# Accept OCR variants: "1.Material", "1) Material", "1 Material"
+# but reject fractions like "5/16: C10B21".
+_NUMBERED_RE = re.compile(r"^\s*(\d{1,2})(?!\s*/\s*\d)\s*[\.):]?\s*(.+?)\s*$")
+# Materials continuation lines (e.g. "5/16: C10B21")
+_FRACTION_RE = re.compile(r"^\s*#?\d+\s*/\s*\d+\s*:\s*.+$", re.IGNORECASE)
+_MATERIAL_RE = re.compile(r"material", re.IGNORECASE)
+_TRANSLATION_RE = re.compile(r"^\s*[（(].+[)）]\s*$")
+_NOTE_KEYWORDS_RE = re.compile(
+    r"material|hardness|thread|hydrogen|impact|bending|according|test|head",
+    re.IGNORECASE,
+)
+
+# Spec-table column headers and pure-numeric rows that can leak into the
+# Notes crop when the spec table appears just below the Notes box.
+_SPEC_NOISE_EXACT = re.compile(
+    r"^(?:"
+    r"Case\s*Depth"
+    r"|渗碳層|滲碳層"
+    r"|Torsional"
+    r"|扭力值?\s*Min"
+    r"|扭力強度"
+    r"|Drive\s+in\s+Torsional"
+    r"|旋入扭力.*"
+    r"|kgf[\s·]*cm"
+    r"|lb-in\.?"
+    r"|Nm"
+    r"|Eht\s*\d+.*"          # e.g. "Eht 400 HV0.3"
+    r"|Min|Max"              # standalone column sub-headers
+    r"|Ref\.$"               # lone "Ref." column label (but NOT "Ref. DIN…" which has more text)
+    r"|RF-[A-Z0-9\-]+"       # drawing number strings leaked from header (e.g. RF-A1-0378-1)
+    r"|Torsion\s*Stre.*"     # "Torsion Strength" column header variants
+    r"|渗碳層\s*mm|滲碳層\s*mm"  # "Case Depth mm" Chinese label
+    r")$",
+    re.IGNORECASE,
+)
+_PURE_NUMERIC = re.compile(r"^[\d.,\s~±\-/×≥≤<>°%]+$")
+
+
+def _is_spec_noise(line: str) -> bool:
+    """Return True if *line* looks like a spec-table header/value, not a Note."""
+    return bool(_PURE_NUMERIC.fullmatch(line) or _SPEC_NOISE_EXACT.fullmatch(line))
 
 
 def _clean_notes_text(text: str) -> str:
@@ -265,78 +560,41 @@ def _clean_notes_text(text: str) -> str:
     if not text:
         return ""
 
-    raw_lines = [line.strip() for line in text.splitlines() if line.strip()]
-
-    # Spec-table column headers and pure-numeric rows that can leak into the
-    # Notes crop when the spec table appears just below the Notes box.
-    _SPEC_NOISE_EXACT = re.compile(
-        r"^(?:"
-        r"Case\s*Depth"
-        r"|渗碳層|滲碳層"
-        r"|Torsional"
-        r"|扭力值?\s*Min"
-        r"|扭力強度"
-        r"|Drive\s+in\s+Torsional"
-        r"|旋入扭力.*"
-        r"|kgf[\s·]*cm"
-        r"|lb-in\.?"
-        r"|Nm"
-        r"|Eht\s*\d+.*"          # e.g. "Eht 400 HV0.3"
-        r"|Min|Max"              # standalone column sub-headers
-        r"|Ref\.$"               # lone "Ref." column label (but NOT "Ref. DIN…" which has more text)
-        r"|RF-[A-Z0-9\-]+"       # drawing number strings leaked from header (e.g. RF-A1-0378-1)
-        r"|Torsion\s*Stre.*"     # "Torsion Strength" column header variants
-        r"|渗碳層\s*mm|滲碳層\s*mm"  # "Case Depth mm" Chinese label
-        r")$",
-        re.IGNORECASE,
-    )
-    _PURE_NUMERIC = re.compile(r"^[\d.,\s~±\-/×≥≤<>°%]+$")
+    # 1) Single fused pass: cleanup, de-dup, and classification per line.
+    #    (Formerly three sequential list passes; fused to touch each line's
+    #    string data once while it is hot.)
+    notes_header = []
+    numbered = {}
+    english_rest = []
+    translation_rest = []
+    seen = set()
 
-    def _is_spec_noise(line: str) -> bool:
-        """Return True if *line* looks like a spec-table header/value, not a Note."""
-        return bool(_PURE_NUMERIC.fullmatch(line) or _SPEC_NOISE_EXACT.fullmatch(line))
+    for line in text.splitlines():
+        line = _WS_RE.sub(" ", line).strip()
 
-    # 1) Basic cleanup: remove tiny noise, leaked non-notes headers, and
-    #    spec-table content that leaked in from below the Notes box.
-    cleaned = []
-    for line in raw_lines:
-        line = re.sub(r"\s+", " ", line).strip()
+        # Cleanup: tiny noise, leaked non-notes headers, spec-table content
+        # that leaked in from below the Notes box.
         if len(line) < 3:
             continue
-        if re.search(r"Drawing\s*N(?:O|o)\.?", line):
+        if _DRAWING_NO_RE.search(line):
             continue
-        if re.fullmatch(r"[\W_]+", line):
+        if _NON_WORD_RE.fullmatch(line):
             continue
         if _is_spec_noise(line):
             continue
-        cleaned.append(line)
 
-    # 2) De-duplicate near-identical OCR lines.
-    deduped = []
-    seen = set()
-    for line in cleaned:
-        key = re.sub(r"[^0-9A-Za-z\u4e00-\u9fff]+", "", line).lower()
-        if len(key) < 2:
-            continue
-        if key in seen:
+        # De-duplicate near-identical OCR lines.
+        key = "".join(_DEDUP_KEY_RE.findall(line)).lower()
+        if len(key) < 2 or key in seen:
             continue
         seen.add(key)
-        deduped.append(line)
 
-    # 3) Classify lines.
-    notes_header = []
-    numbered = {}
-    english_rest = []
-    translation_rest = []
-
-    for line in deduped:
-        if re.search(r"\bNotes\s*:", line, re.IGNORECASE):
+        # Classify.
+        if _NOTES_HDR_RE.search(line):
             notes_header.append("Notes:")
             continue
 
-        # Accept OCR variants: "1.Material", "1) Material", "1 Material"
-        # but reject fractions like "5/16: C10B21".
-        m = re.match(r"^\s*(\d{1,2})(?!\s*/\s*\d)\s*[\.):]?\s*(.+?)\s*$", line)
+        m = _NUMBERED_RE.match(line)
         if m:
             idx = int(m.group(1))
             body = m.group(2).strip()
@@ -344,30 +602,25 @@ def _clean_notes_text(text: str) -> str:
                 numbered.setdefault(idx, f"{idx}. {body}")
             continue
 
-        # Materials continuation lines (e.g. "5/16: C10B21")
-        if re.match(r"^\s*#?\d+\s*/\s*\d+\s*:\s*.+$", line, re.IGNORECASE):
-            if 1 in numbered and re.search(r"material", numbered[1], re.IGNORECASE):
+        if _FRACTION_RE.match(line):
+            if 1 in numbered and _MATERIAL_RE.search(numbered[1]):
                 numbered[1] = f"{numbered[1]}\n{line}"
             else:
                 english_rest.append(line)
             continue
 
-        if re.match(r"^\s*[（(].+[)）]\s*$", line):
+        if _TRANSLATION_RE.match(line):
             translation_rest.append(line)
         else:
             english_rest.append(line)
 
-    # 4) If OCR dropped a leading number, try to fill missing indices with
+    # 2) If OCR dropped a leading number, try to fill missing indices with
     #    note-like unnumbered English lines.
     if numbered and english_rest:
         note_like = []
         non_note_like = []
         for line in english_rest:
-            if re.search(
-                r"material|hardness|thread|hydrogen|impact|bending|according|test|head",
-                line,
-                re.IGNORECASE,
-            ):
+            if _NOTE_KEYWORDS_RE.search(line):
                 note_like.append(line)
             else:
                 non_note_like.append(line)
@@ -382,7 +635,7 @@ def _clean_notes_text(text: str) -> str:
 
         english_rest = non_note_like
 
-    # 5) Attach known Chinese translations to matching English numbered lines.
+    # 3) Attach known Chinese translations to matching English numbered lines.
     attached = {}
     unmatched_translation = []
     map_rules = [
@@ -413,7 +666,7 @@ def _clean_notes_text(text: str) -> str:
         else:
             attached.setdefault(target_idx, []).append(line)
 
-    # 6) Build final order.
+    # 4) Build final order.
     ordered = []
     if notes_header:
         ordered.append("Notes:")
@@ -433,24 +686,26 @@ def _clean_notes_text(text: str) -> str:
 # ---------------------------------------------------------------------------
 
 
-def extract_notes_from_pdf(
+def _extract_at_dpi(
     pdf_path: str,
     models: dict,
-    page_idx: int = 0,
-    dpi: int = RENDER_DPI,
+    page_idx: int,
+    dpi: int,
     include_crop_image: bool = True,
+    doc=None,  # pdfium.PdfDocument | None — reuse an already-parsed document
 ) -> dict:
     """
-    Extract the Notes section from a scanned engineering drawing PDF.
+    Extract the Notes section from a scanned engineering drawing PDF at a
+    fixed render resolution. Use :func:`extract_notes_from_pdf` for the
+    adaptive-DPI entry point.
 
     Steps
     -----
-    1. Render the PDF page to a PIL Image at *dpi* resolution.
-    2. Auto-detect page orientation (landscape / portrait).
-    3. Select the appropriate template crop coordinates.
-    4. Crop the Notes text region and resize if needed (GPU memory guard).
-    5. Run Surya detection + recognition directly (bypasses Marker layout).
-    6. Return the recognised text and an optional base64 PNG of the crop.
+    1. Rasterize only the Notes region at *dpi* resolution (orientation and
+       crop template resolved from the page box, clip applied by pdfium).
+    2. Resize the crop if needed (GPU memory guard).
+    3. Run Surya detection + recognition directly (bypasses Marker layout).
+    4. Return the recognised text and an optional base64 JPEG of the crop.
 
     Parameters
     ----------
@@ -458,7 +713,7 @@ def extract_notes_from_pdf(
     models            : pre-loaded model dict from ``create_model_dict()``
     page_idx          : 0-based page index (Notes is usually on page 0)
     dpi               : render resolution (default: RENDER_DPI = 150)
-    include_crop_image: if True, include a base64 PNG of the Notes crop
+    include_crop_image: if True, include a base64 JPEG of the Notes crop
 
     Returns
     -------
@@ -468,13 +723,15 @@ def extract_notes_from_pdf(
         crop_bbox      ([x0,y0,x1,y1] in pixels at *dpi* | None)
         orientation    (str)          — "landscape" or "portrait"
         error          (str | None)
-        crop_image_b64 (base64 PNG | None)
+        crop_image_b64 (base64 JPEG | None)
     """
     # ------------------------------------------------------------------
-    # Step 1 — Render the page
+    # Step 1 — Rasterize only the Notes region (pdfium clip rect)
     # ------------------------------------------------------------------
     try:
-        page_image = _render_page(pdf_path, page_idx, dpi)
+        crop_arr, bbox, orientation = _render_notes_crop(
+            pdf_path, page_idx, dpi, doc=doc
+        )
     except Exception as exc:
         return {
             "success": False,
@@ -485,36 +742,23 @@ def extract_notes_from_pdf(
             "crop_image_b64": None,
         }
 
-    img_w, img_h = page_image.size
-    print(f"[Notes] Page rendered: {img_w}×{img_h} px  (dpi={dpi})")
-
-    # ------------------------------------------------------------------
-    # Step 2 — Detect orientation & pick crop parameters
-    # ------------------------------------------------------------------
-    orientation = _detect_orientation(page_image)
-    if orientation == "landscape":
-        x_min, x_max, y_min, y_max = LAND_X_MIN, LAND_X_MAX, LAND_Y_MIN, LAND_Y_MAX
-    else:
-        x_min, x_max, y_min, y_max = PORT_X_MIN, PORT_X_MAX, PORT_Y_MIN, PORT_Y_MAX
-
+    # Single crop-sized copy: Surya's predictors and the preview encoder both
+    # want a PIL image.
+    crop = Image.fromarray(np.ascontiguousarray(crop_arr))
+    del crop_arr
     print(
-        f"[Notes] Orientation: {orientation}  crop=({x_min},{y_min})→({x_max},{y_max})"
+        f"[Notes] Orientation: {orientation}  crop bbox: {bbox}  "
+        f"size: {crop.size[0]}×{crop.size[1]} px  (dpi={dpi})"
     )
 
     # ------------------------------------------------------------------
-    # Step 3 — Crop the Notes text region
-    # ------------------------------------------------------------------
-    crop, bbox = _crop_notes_region(page_image, x_min, x_max, y_min, y_max)
-    print(f"[Notes] Crop bbox: {bbox}  size: {crop.size[0]}×{crop.size[1]} px")
-
-    # ------------------------------------------------------------------
-    # Step 4 — Limit crop size to protect GPU VRAM
+    # Step 2 — Limit crop size to protect GPU VRAM
     # ------------------------------------------------------------------
     crop = _limit_size(crop)
     print(f"[Notes] After size limit: {crop.size[0]}×{crop.size[1]} px")
 
     # ------------------------------------------------------------------
-    # Step 5 — Build crop preview image (always, before OCR)
+    # Step 3 — Build crop preview image (always, before OCR)
     #           so it is available even when OCR fails.
     # ------------------------------------------------------------------
     crop_b64 = None
@@ -526,7 +770,7 @@ def extract_notes_from_pdf(
             print(f"[Notes] Warning: failed to encode crop image: {enc_exc}")
 
     # ------------------------------------------------------------------
-    # Step 6 — OCR via Surya (detection + recognition, no layout model)
+    # Step 4 — OCR via Surya (detection + recognition, no layout model)
     #
     # Portrait pages use a spatial filter: detected text-line bboxes
     # whose centre-X lies in the rightmost 30 % of the crop are dropped.
@@ -556,7 +800,7 @@ def extract_notes_from_pdf(
     print(f"[Notes] OCR done — {len(notes_text)} chars")
 
     # ------------------------------------------------------------------
-    # Step 7 — Return results
+    # Step 5 — Return results
     # ------------------------------------------------------------------
     return {
         "success": True,
@@ -566,3 +810,272 @@ def extract_notes_from_pdf(
         "error": None,
         "crop_image_b64": crop_b64,
     }
+
+
+def ocr_image_file(image_path: str, models: dict) -> str:
+    """
+    OCR an image upload directly with Surya, skipping the PDF pipeline.
+
+    Image files fed through Marker's PdfConverter get wrapped in a synthetic
+    one-page PDF and re-rasterized before the layout model runs — wasted
+    work when the goal is the text. Detection + recognition run straight on
+    the PIL image; lines come back top-to-bottom (see
+    :func:`_filter_sorted_polygons`) joined with newlines.
+    """
+    with Image.open(image_path) as img:
+        image = img.convert("RGB")
+    # Full pages carry smaller text than Notes crops, so allow more pixels
+    # than MAX_CROP_PIXELS before the VRAM guard kicks in.
+    image = _limit_size(image, max_pixels=2048)
+    return _ocr_image_surya(image, models)
+
+
+def _line_count(text) -> int:
+    """Count non-empty lines in an OCR result string ('' and None → 0)."""
+    if not text:
+        return 0
+    return sum(1 for line in text.splitlines() if line.strip())
+
+
+def extract_notes_from_pdf(
+    pdf_path: str,
+    models: dict,
+    page_idx: int = 0,
+    dpi=None,  # int | None — None enables the adaptive two-pass render
+    include_crop_image: bool = True,
+) -> dict:
+    """
+    Extract the Notes section from a scanned engineering drawing PDF.
+
+    By default the page is rendered at FAST_RENDER_DPI first; if OCR comes
+    back with fewer than MIN_NOTES_LINES non-empty lines, the page is
+    re-rendered at RENDER_DPI and OCR'd again. Passing an explicit *dpi*
+    disables the fallback and renders once at that resolution.
+
+    See :func:`_extract_at_dpi` for the result dict shape.
+    """
+    if dpi is not None:
+        return _extract_at_dpi(pdf_path, models, page_idx, dpi, include_crop_image)
+
+    # One parse for both passes: the 150 DPI retry re-renders the same file,
+    # and pdfium parse cost is paid per open, not per render.
+    try:
+        with open_pdf(pdf_path) as doc:
+            result = _extract_at_dpi(
+                pdf_path, models, page_idx, FAST_RENDER_DPI,
+                include_crop_image, doc=doc,
+            )
+            if (
+                result["success"]
+                and _line_count(result["notes_text"]) < MIN_NOTES_LINES
+            ):
+                print(
+                    f"[Notes] <{MIN_NOTES_LINES} lines at {FAST_RENDER_DPI} DPI — "
+                    f"retrying at {RENDER_DPI} DPI"
+                )
+                result = _extract_at_dpi(
+                    pdf_path, models, page_idx, RENDER_DPI,
+                    include_crop_image, doc=doc,
+                )
+        return result
+    except Exception as exc:  # pdfium failed to open/parse the file
+        return {
+            "success": False,
+            "notes_text": None,
+            "crop_bbox": None,
+            "orientation": None,
+            "error": f"Failed to open PDF: {exc}",
+            "crop_image_b64": None,
+        }
+
+
+def _extract_batch_at_dpi(
+    pdf_paths: list,
+    models: dict,
+    page_idx: int,
+    dpi: int,
+    include_crop_image: bool = True,
+) -> list:
+    """
+    Batched Notes extraction at a fixed render resolution. Use
+    :func:`extract_notes_from_pdfs` for the adaptive-DPI entry point.
+
+    Notes extraction touches a single page per file, so the crops of a whole
+    batch are uniform work items: detection and recognition each run once
+    over the full stack of crops instead of once per file, keeping the GPU
+    batch-filled. Rendering/cropping stays per file on the CPU.
+
+    Returns one result dict per input path, in input order, with the same
+    shape as :func:`extract_notes_from_pdf`.
+    """
+    det_model = models.get("detection_model")
+    rec_model = models.get("recognition_model")
+
+    if det_model is None or rec_model is None:
+        raise RuntimeError(
+            "'detection_model' or 'recognition_model' missing from models dict. "
+            "Make sure create_model_dict() was called before extract_notes_from_pdfs()."
+        )
+
+    def _result(success, notes_text, bbox, orientation, error, crop_b64):
+        return {
+            "success": success,
+            "notes_text": notes_text,
+            "crop_bbox": list(bbox) if bbox is not None else None,
+            "orientation": orientation,
+            "error": error,
+            "crop_image_b64": crop_b64,
+        }
+
+    results = [None] * len(pdf_paths)
+    prepared = []  # (slot, crop, bbox, orientation, crop_b64, max_col_frac)
+
+    # ── Phase 1: render + crop every file (CPU) ────────────────────────────
+    # Renders stay sequential on purpose: pdfium releases the GIL but the
+    # library itself is not thread-safe, so fanning renders out to a thread
+    # pool would need a process pool (not worth it for clip-rect renders
+    # that take a few ms each).
+    for slot, pdf_path in enumerate(pdf_paths):
+        try:
+            crop_arr, bbox, orientation = _render_notes_crop(
+                pdf_path, page_idx, dpi
+            )
+        except Exception as exc:
+            results[slot] = _result(
+                False, None, None, None,
+                f"Failed to render page {page_idx}: {exc}", None,
+            )
+            continue
+
+        # Materialize PIL only for the crop (see _render_notes_crop).
+        crop = Image.fromarray(np.ascontiguousarray(crop_arr))
+        del crop_arr
+        crop = _limit_size(crop)
+
+        crop_b64 = None
+        if include_crop_image:
+            try:
+                crop_b64 = _to_b64(crop)
+            except Exception as enc_exc:
+                print(f"[Notes] Warning: failed to encode crop image: {enc_exc}")
+
+        # Visibly blank crops resolve immediately instead of joining the
+        # detection batch (same guard as _ocr_image_surya).
+        if not _has_ink(crop):
+            results[slot] = _result(True, "", bbox, orientation, None, crop_b64)
+            continue
+
+        # Same spatial guard as the single-file path (see extract_notes_from_pdf).
+        max_col_frac = 0.80 if orientation == "portrait" else None
+        prepared.append((slot, crop, bbox, orientation, crop_b64, max_col_frac))
+
+    if not prepared:
+        return results
+
+    # ── Phase 2: one detection call over all crops ─────────────────────────
+    crops = [p[1] for p in prepared]
+    try:
+        with _inference_ctx():
+            det_results = det_model(images=crops, batch_size=min(len(crops), DET_BATCH))
+    except Exception as exc:
+        for slot, _, bbox, orientation, crop_b64, _ in prepared:
+            results[slot] = _result(
+                False, None, bbox, orientation, f"OCR failed: {exc}", crop_b64
+            )
+        return results
+
+    rec_items = []  # (prepared_index, polygons)
+    for i, (det_result, prep) in enumerate(zip(det_results, prepared)):
+        slot, crop, bbox, orientation, crop_b64, max_col_frac = prep
+        polygons = _filter_sorted_polygons(det_result, crop.size[0], max_col_frac)
+        if polygons:
+            rec_items.append((i, polygons))
+        else:
+            results[slot] = _result(True, "", bbox, orientation, None, crop_b64)
+
+    if not rec_items:
+        return results
+
+    # ── Phase 3: one recognition call over all crops with detections ───────
+    try:
+        with _inference_ctx():
+            rec_results = rec_model(
+                images=[crops[i] for i, _ in rec_items],
+                task_names=[TaskNames.ocr_with_boxes] * len(rec_items),
+                polygons=[polys for _, polys in rec_items],
+                input_text=[[""] * len(polys) for _, polys in rec_items],
+                recognition_batch_size=min(
+                    RECOGNITION_BATCH,
+                    max(1, sum(len(polys) for _, polys in rec_items)),
+                ),
+                sort_lines=False,  # polygons are pre-sorted top-to-bottom
+                math_mode=False,
+                drop_repeated_text=False,
+                max_sliding_window=REC_MAX_SLIDING_WINDOW,
+                max_tokens=REC_MAX_TOKENS,
+            )
+    except Exception as exc:
+        for i, _ in rec_items:
+            slot, _, bbox, orientation, crop_b64, _ = prepared[i]
+            results[slot] = _result(
+                False, None, bbox, orientation, f"OCR failed: {exc}", crop_b64
+            )
+        return results
+
+    for (i, _polys), rec_result in zip(rec_items, rec_results):
+        slot, _, bbox, orientation, crop_b64, _ = prepared[i]
+        lines = []
+        if rec_result.text_lines:
+            for line in rec_result.text_lines:
+                text = line.text.strip()
+                if text:
+                    lines.append(text)
+        notes_text = _clean_notes_text("\n".join(lines))
+        results[slot] = _result(True, notes_text, bbox, orientation, None, crop_b64)
+
+    return results
+
+
+def extract_notes_from_pdfs(
+    pdf_paths: list,
+    models: dict,
+    page_idx: int = 0,
+    dpi=None,  # int | None — None enables the adaptive two-pass render
+    include_crop_image: bool = True,
+) -> list:
+    """
+    Batched variant of :func:`extract_notes_from_pdf` for multiple files.
+
+    Applies the same adaptive render strategy: the whole batch renders at
+    FAST_RENDER_DPI first, then the (typically empty) subset of files whose
+    OCR yielded fewer than MIN_NOTES_LINES lines is re-run as a second batch
+    at RENDER_DPI. Passing an explicit *dpi* renders once at that resolution.
+    """
+    if dpi is not None:
+        return _extract_batch_at_dpi(
+            pdf_paths, models, page_idx, dpi, include_crop_image
+        )
+
+    results = _extract_batch_at_dpi(
+        pdf_paths, models, page_idx, FAST_RENDER_DPI, include_crop_image
+    )
+    retry = [
+        slot
+        for slot, result in enumerate(results)
+        if result["success"] and _line_count(result["notes_text"]) < MIN_NOTES_LINES
+    ]
+    if retry:
+        print(
+            f"[Notes] {len(retry)}/{len(pdf_paths)} file(s) <{MIN_NOTES_LINES} "
+            f"lines at {FAST_RENDER_DPI} DPI — retrying at {RENDER_DPI} DPI"
+        )
+        retry_results = _extract_batch_at_dpi(
+            [pdf_paths[slot] for slot in retry],
+            models,
+            page_idx,
+            RENDER_DPI,
+            include_crop_image,
+        )
+        for slot, result in zip(retry, retry_results):
+            results[slot] = result
+    return results
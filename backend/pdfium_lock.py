@@ -0,0 +1,19 @@
+"""
+Process-wide PDFium serialization.
+
+PDFium releases the GIL while it works, but the library itself is not
+thread-safe: two threads inside pdfium at the same time can corrupt state or
+segfault. Every explicit pypdfium2 call site in this codebase — quality-check
+rendering, native-text probing, notes-crop parsing/rendering — must hold
+PDFIUM_LOCK around its pdfium calls.
+
+Marker also drives pdfium internally from the marker executor, where the lock
+cannot be taken; callers therefore route their own pdfium work onto that same
+executor so it cannot overlap Marker's. That guarantee needs the executor to
+stay single-threaded — which is why MARKER_WORKERS is clamped to 1 in main.py
+— and the lock is the backstop covering our call sites against each other.
+"""
+
+import threading
+
+PDFIUM_LOCK = threading.Lock()
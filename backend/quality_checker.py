@@ -43,12 +43,15 @@ def _load_image(file_path: str, file_type: str) -> Image.Image:
     """Load image from file. For PDFs, render the first page."""
     if file_type == "pdf":
         import pypdfium2 as pdfium
-        pdf = pdfium.PdfDocument(file_path)
-        page = pdf[0]
-        scale = PDF_CHECK_DPI / 72.0
-        bitmap = page.render(scale=scale, rotation=0)
-        img = bitmap.to_pil()
-        pdf.close()
+        from pdfium_lock import PDFIUM_LOCK
+
+        with PDFIUM_LOCK:  # PDFium is not thread-safe
+            pdf = pdfium.PdfDocument(file_path)
+            page = pdf[0]
+            scale = PDF_CHECK_DPI / 72.0
+            bitmap = page.render(scale=scale, rotation=0)
+            img = bitmap.to_pil()
+            pdf.close()
         return img
     else:
         return Image.open(file_path).convert("RGB")
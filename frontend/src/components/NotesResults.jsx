@@ -32,8 +32,8 @@ const NotesResults = ({ results, onNewUpload }) => {
   const handleDownloadImage = (result) => {
     if (!result.crop_image_b64) return;
     const a    = document.createElement("a");
-    a.href     = `data:image/png;base64,${result.crop_image_b64}`;
-    a.download = result.filename.replace(/\.[^.]+$/, "_notes_crop.png");
+    a.href     = `data:image/jpeg;base64,${result.crop_image_b64}`;
+    a.download = result.filename.replace(/\.[^.]+$/, "_notes_crop.jpg");
     document.body.appendChild(a);
     a.click();
     document.body.removeChild(a);
@@ -52,7 +52,7 @@ const NotesResults = ({ results, onNewUpload }) => {
       const base = r.filename.replace(/\.[^.]+$/, "");
       zip.file(`${base}_notes.txt`, r.notes_text || "");
       if (r.crop_image_b64)
-        zip.file(`${base}_notes_crop.png`, b64ToUint8Array(r.crop_image_b64));
+        zip.file(`${base}_notes_crop.jpg`, b64ToUint8Array(r.crop_image_b64));
     });
     const blob = await zip.generateAsync({ type: "blob" });
     saveAs(blob, "notes_results.zip");
@@ -208,7 +208,7 @@ const NotesResults = ({ results, onNewUpload }) => {
                       </span>
                     </p>
                     <img
-                      src={`data:image/png;base64,${current.crop_image_b64}`}
+                      src={`data:image/jpeg;base64,${current.crop_image_b64}`}
                       alt="Notes region crop"
                       className="max-w-full border border-outline-variant dark:border-[#4c463c] rounded-2xl shadow-sm"
                       style={{ imageRendering: "crisp-edges" }}